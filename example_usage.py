@@ -5,7 +5,8 @@ Demonstrates how to generate a property valuation report
 """
 
 import os
-from src.reval_agent import ReValAgent
+import logging
+from src.reval_agent import get_agent
 
 def main():
     """Example of how to use the reVal agent"""
@@ -21,7 +22,7 @@ def main():
     
     # Create the agent
     print("🏠 Initializing reVal Agent...")
-    agent = ReValAgent()
+    agent = get_agent()
     
     # Example property
     address = "123 Main Street"
@@ -41,4 +42,8 @@ def main():
         print("💡 Check your API key and property address")
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     main()
@@ -4,15 +4,69 @@ Creates beautiful PDF documents with property valuation data
 """
 
 import os
+from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.platypus.flowables import HRFlowable
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from typing import Dict, Any, Tuple
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+# Page geometry in points (letter, 1 inch margins with a short bottom margin)
+MARGIN = 72
+BOTTOM_MARGIN = 18
+
+# Text colors
+TITLE_COLOR = (0x2E, 0x86, 0xAB)
+SECTION_COLOR = (0xA2, 0x3B, 0x72)
+FACTOR_COLOR = (0xF1, 0x8F, 0x01)
+TEXT_COLOR = (0, 0, 0)
+
+# Rules, table grid and label background
+GREY = (128, 128, 128)
+LABEL_FILL = (0xF0, 0xF0, 0xF0)
+
+# Summary table column widths and row height
+LABEL_WIDTH = 144
+VALUE_WIDTH = 216
+ROW_HEIGHT = 18
+
+# Line height for 10pt body text
+LINE_HEIGHT = 12
+
+# Characters replaced when turning an address into a filename
+_SANITIZE = str.maketrans({' ': '_', '/': '_', '\\': '_'})
+
+def _fmt_int(value: Any, prefix: str = '') -> str:
+    """Format a numeric field with thousands separators, or 'N/A' if missing"""
+    if not value or value == 'N/A':
+        return 'N/A'
+    try:
+        return f"{prefix}{int(value):,}"
+    except (TypeError, ValueError):
+        return str(value)
+
+def _winansi(value: Any) -> str:
+    """Coerce text to what the built-in PDF fonts can encode (WinAnsi / cp1252)"""
+    return str(value).encode('cp1252', 'replace').decode('cp1252')
+
+# (display name, analysis key) for the 10 quality factors, in report order
+FACTORS: Tuple[Tuple[str, str], ...] = (
+    ('Location', 'location'),
+    ('Lot Quality', 'lot_quality'),
+    ('Lot Utilization', 'lot_utilization'),
+    ('Lot Orientation', 'lot_orientation'),
+    ('Privacy', 'privacy'),
+    ('Views', 'views'),
+    ('Architectural Style', 'architectural_style'),
+    ('Finishes', 'finishes'),
+    ('Layout', 'layout'),
+    ('Scale & Volume', 'scale_&_volume'),
+)
+
+FOOTER_LINES = (
+    "This report was generated by reVal - Real Estate Valuation Agent.",
+    "The analysis is based on available property data and market information.",
+    "For professional real estate advice, consult with a licensed real estate professional.",
+)
 
 class ReValPDFGenerator:
     """Generates professional PDF reports for property valuations"""
@@ -20,37 +74,6 @@ class ReValPDFGenerator:
     def __init__(self, output_dir: str = "./output"):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
-        
-        # Set up styles
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
-    
-    def _setup_custom_styles(self):
-        """Set up custom paragraph styles"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#2E86AB')
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            textColor=colors.HexColor('#A23B72')
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='FactorHeader',
-            parent=self.styles['Heading3'],
-            fontSize=14,
-            spaceAfter=8,
-            textColor=colors.HexColor('#F18F01')
-        ))
     
     def generate_report(self, property_data: Dict[str, Any], analysis: Dict[str, Any]) -> str:
         """
@@ -65,131 +88,147 @@ class ReValPDFGenerator:
         """
         # Generate filename
         address = property_data.get('address', 'Unknown Address')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"reVal_Report_{address.replace(' ', '_')}_{timestamp}.pdf"
+        now = datetime.now()
+        # zpid and microseconds keep concurrent reports for the same street apart
+        timestamp = now.strftime('%Y%m%d_%H%M%S_%f')
+        report_date = now.strftime('%B %d, %Y')
+        zpid = property_data.get('zpid')
+        stem = f"{address}_{zpid}" if zpid else address
+        filename = f"reVal_Report_{stem.translate(_SANITIZE)}_{timestamp}.pdf"
         filepath = os.path.join(self.output_dir, filename)
         
         # Create PDF document
-        doc = SimpleDocTemplate(
-            filepath,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18
-        )
+        pdf = FPDF(unit='pt', format='letter')
+        pdf.set_margins(MARGIN, MARGIN, MARGIN)
+        pdf.set_auto_page_break(True, margin=BOTTOM_MARGIN)
+        pdf.c_margin = 0
+        pdf.core_fonts_encoding = 'windows-1252'
+        pdf.add_page()
         
         # Build content
-        story = []
-        story.extend(self._build_header(property_data))
-        story.extend(self._build_property_summary(property_data))
-        story.extend(self._build_quality_factors(analysis))
-        story.extend(self._build_footer())
-        
-        # Generate PDF
-        doc.build(story)
+        self._build_header(pdf, property_data, report_date)
+        self._build_property_summary(pdf, property_data)
+        self._build_quality_factors(pdf, analysis)
+        self._build_footer(pdf)
+        
+        # Render in memory and write it out in one go, so a failed build
+        # never leaves a partial file behind
+        Path(filepath).write_bytes(pdf.output())
         return filepath
     
-    def _build_header(self, property_data: Dict[str, Any]) -> list:
+    def _heading(self, pdf: FPDF, text: str, size: int, color: tuple, space_after: float, align: str = 'L'):
+        """Write a bold heading line"""
+        pdf.set_font('Helvetica', 'B', size)
+        pdf.set_text_color(*color)
+        pdf.cell(0, size * 1.2, _winansi(text), align=align, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(space_after)
+        pdf.set_text_color(*TEXT_COLOR)
+    
+    def _labeled(self, pdf: FPDF, label: str, text: Any):
+        """Write a body paragraph with a bold leading label"""
+        label = _winansi(label)
+        text = _winansi(f" {text}")
+        pdf.set_font('Helvetica', 'B', 10)
+        label_width = pdf.get_string_width(label)
+        pdf.set_font('Helvetica', '', 10)
+        
+        # Most lines fit on one row; only fall back to line wrapping when they don't
+        if label_width + pdf.get_string_width(text) <= pdf.epw:
+            pdf.set_font('Helvetica', 'B', 10)
+            pdf.cell(label_width, LINE_HEIGHT, label)
+            pdf.set_font('Helvetica', '', 10)
+            pdf.cell(0, LINE_HEIGHT, text, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            return
+        
+        pdf.set_font('Helvetica', 'B', 10)
+        pdf.write(LINE_HEIGHT, label)
+        pdf.set_font('Helvetica', '', 10)
+        pdf.write(LINE_HEIGHT, text)
+        pdf.ln(LINE_HEIGHT)
+    
+    def _rule(self, pdf: FPDF):
+        """Draw a horizontal line across the text width"""
+        pdf.set_draw_color(*GREY)
+        pdf.set_line_width(1)
+        pdf.line(pdf.l_margin, pdf.get_y(), pdf.w - pdf.r_margin, pdf.get_y())
+    
+    def _build_header(self, pdf: FPDF, property_data: Dict[str, Any], report_date: str):
         """Build the report header"""
-        story = []
-        
         # Title
-        story.append(Paragraph("reVal Property Analysis Report", self.styles['CustomTitle']))
-        story.append(Spacer(1, 20))
+        self._heading(pdf, "reVal Property Analysis Report", 24, TITLE_COLOR, 30, align='C')
+        pdf.ln(20)
         
         # Property address
         address = property_data.get('address', 'Address Not Available')
-        story.append(Paragraph(f"<b>Property:</b> {address}", self.styles['Normal']))
-        story.append(Spacer(1, 10))
+        self._labeled(pdf, "Property:", address)
+        pdf.ln(10)
         
         # Report date
-        report_date = datetime.now().strftime('%B %d, %Y')
-        story.append(Paragraph(f"<b>Report Date:</b> {report_date}", self.styles['Normal']))
-        story.append(Spacer(1, 20))
+        self._labeled(pdf, "Report Date:", report_date)
+        pdf.ln(20)
         
         # Horizontal line
-        story.append(HRFlowable(width="100%", thickness=1, color=colors.grey))
-        story.append(Spacer(1, 20))
-        
-        return story
+        self._rule(pdf)
+        pdf.ln(20)
     
-    def _build_property_summary(self, property_data: Dict[str, Any]) -> list:
+    def _build_property_summary(self, pdf: FPDF, property_data: Dict[str, Any]):
         """Build property summary section"""
-        story = []
-        
-        story.append(Paragraph("Property Summary", self.styles['SectionHeader']))
+        self._heading(pdf, "Property Summary", 16, SECTION_COLOR, 12)
         
         # Create summary table
         summary_data = [
             ['Property Type:', property_data.get('propertyType', 'N/A')],
             ['Bedrooms:', str(property_data.get('bedrooms', 'N/A'))],
             ['Bathrooms:', str(property_data.get('bathrooms', 'N/A'))],
-            ['Square Feet:', f"{property_data.get('livingArea', 'N/A'):,}" if property_data.get('livingArea') else 'N/A'],
+            ['Square Feet:', _fmt_int(property_data.get('livingArea'))],
             ['Lot Size:', property_data.get('lotAreaValue', 'N/A')],
             ['Year Built:', str(property_data.get('yearBuilt', 'N/A'))],
-            ['Estimated Value:', f"${property_data.get('zestimate', 'N/A'):,}" if property_data.get('zestimate') else 'N/A']
+            ['Estimated Value:', _fmt_int(property_data.get('zestimate'), prefix='$')]
         ]
         
-        summary_table = Table(summary_data, colWidths=[2*inch, 3*inch])
-        summary_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0'))
-        ]))
-        
-        story.append(summary_table)
-        story.append(Spacer(1, 30))
-        
-        return story
+        # Centered within the text width, grey grid, shaded bold labels
+        table_x = pdf.l_margin + (pdf.epw - LABEL_WIDTH - VALUE_WIDTH) / 2
+        pdf.set_draw_color(*GREY)
+        pdf.set_line_width(0.5)
+        pdf.set_fill_color(*LABEL_FILL)
+        pdf.c_margin = 6
+        
+        for label, value in summary_data:
+            pdf.set_x(table_x)
+            pdf.set_font('Helvetica', 'B', 10)
+            pdf.cell(LABEL_WIDTH, ROW_HEIGHT, _winansi(label), border=1, fill=True)
+            pdf.set_font('Helvetica', '', 10)
+            pdf.cell(VALUE_WIDTH, ROW_HEIGHT, _winansi(value), border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        
+        pdf.c_margin = 0
+        pdf.ln(30)
     
-    def _build_quality_factors(self, analysis: Dict[str, Any]) -> list:
+    def _build_quality_factors(self, pdf: FPDF, analysis: Dict[str, Any]):
         """Build the 10 quality factors analysis section"""
-        story = []
-        
-        story.append(Paragraph("10 Quality Factors Analysis", self.styles['SectionHeader']))
-        story.append(Spacer(1, 15))
+        self._heading(pdf, "10 Quality Factors Analysis", 16, SECTION_COLOR, 12)
+        pdf.ln(15)
         
-        factors = [
-            'Location', 'Lot Quality', 'Lot Utilization', 'Lot Orientation', 'Privacy',
-            'Views', 'Architectural Style', 'Finishes', 'Layout', 'Scale & Volume'
-        ]
-        
-        for i, factor in enumerate(factors, 1):
-            factor_data = analysis.get(factor.lower().replace(' ', '_'), {})
+        for i, (factor, key) in enumerate(FACTORS, 1):
+            factor_data = analysis.get(key, {})
             
-            story.append(Paragraph(f"{i}. {factor}", self.styles['FactorHeader']))
+            self._heading(pdf, f"{i}. {factor}", 14, FACTOR_COLOR, 8)
             
             # Score
             score = factor_data.get('score', 'Not Rated')
-            story.append(Paragraph(f"<b>Score:</b> {score}/10", self.styles['Normal']))
+            self._labeled(pdf, "Score:", f"{score}/10")
             
             # Analysis
             analysis_text = factor_data.get('analysis', 'Analysis not available for this factor.')
-            story.append(Paragraph(f"<b>Analysis:</b> {analysis_text}", self.styles['Normal']))
+            self._labeled(pdf, "Analysis:", analysis_text)
             
-            story.append(Spacer(1, 15))
-        
-        return story
+            pdf.ln(15)
     
-    def _build_footer(self) -> list:
+    def _build_footer(self, pdf: FPDF):
         """Build report footer"""
-        story = []
-        
-        story.append(Spacer(1, 30))
-        story.append(HRFlowable(width="100%", thickness=1, color=colors.grey))
-        story.append(Spacer(1, 10))
-        
-        footer_text = """
-        <i>This report was generated by reVal - Real Estate Valuation Agent.<br/>
-        The analysis is based on available property data and market information.<br/>
-        For professional real estate advice, consult with a licensed real estate professional.</i>
-        """
-        
-        story.append(Paragraph(footer_text, self.styles['Normal']))
+        pdf.ln(30)
+        self._rule(pdf)
+        pdf.ln(10)
         
-        return story
+        pdf.set_font('Helvetica', 'I', 10)
+        for line in FOOTER_LINES:
+            pdf.cell(0, LINE_HEIGHT, line, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
@@ -3,26 +3,148 @@ reVal Agent - Main orchestrator for real estate valuation
 Coordinates Zillow API data fetching, analysis, and PDF generation
 """
 
+import math
+import time
+import bisect
+import functools
+import types
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from .zillow_client import ZillowClient
-from .pdf_generator import ReValPDFGenerator
+
+# Seconds a single report may spend on API calls, retries and backoff included
+DEFAULT_REPORT_TIMEOUT = 90
+
+# Core fields; a report needs at least two of them to be worth generating
+REQUIRED_FIELDS = ('livingArea', 'bedrooms', 'bathrooms')
+
+def _property_fields(data: Dict[str, Any]) -> types.SimpleNamespace:
+    """Pull every field the analysis uses out of the raw property data once"""
+    return types.SimpleNamespace(
+        lot=data.get('lotAreaValue', 0) or 0,
+        living=data.get('livingArea', 0) or 0,
+        year=data.get('yearBuilt', 0) or 0,
+        beds=data.get('bedrooms', 0) or 0,
+        baths=data.get('bathrooms', 0) or 0,
+        stories=data.get('stories', 1) or 1,
+        ptype=data.get('propertyType', '') or '',
+        addr=data.get('address', ''),
+        city=data.get('city', ''),
+        state=data.get('state', ''),
+        schools=data.get('schools')
+    )
+
+def _lot_utilization(p: types.SimpleNamespace) -> float:
+    """Fraction of the lot covered by living area"""
+    return p.living / p.lot if p.lot > 0 else 0
+
+def _space_per_bedroom(p: types.SimpleNamespace) -> Optional[float]:
+    """Living area per bedroom, or None when bedroom count is unknown"""
+    return p.living / p.beds if p.beds > 0 else None
+
+# The 10 quality factors, in report order. Each entry is
+# (name, extract, cutoffs, bands, describe): extract pulls the value that is
+# scored from the _property_fields record, cutoffs is an ascending list of
+# thresholds, and bands holds one (score, suffix) per interval between them,
+# so bands[i] covers cutoffs[i - 1] < value <= cutoffs[i]. A value of None
+# (not measurable) falls in bands[0]. describe builds the leading analysis text.
+FACTOR_RULES = [
+    ('location',
+     lambda p: 1 if p.schools else 0,
+     [0],
+     [(7, ""),
+      (8, " Good school district in area.")],
+     lambda p, v: f"Property located at {p.addr}, {p.city}, {p.state}."),
+    ('lot_quality',
+     lambda p: p.lot,
+     [5000, 7500, 10000],
+     [(4, " Smaller lot may limit outdoor activities."),
+      (6, " Standard lot size for the area."),
+      (7, " Good-sized lot with adequate space."),
+      (9, " Large lot provides excellent space and potential.")],
+     lambda p, v: f"Lot size: {v} sq ft."),
+    ('lot_utilization',
+     _lot_utilization,
+     # Lower bound of the optimal band is inclusive: value >= 0.15
+     [math.nextafter(0.15, -math.inf), 0.25],
+     [(6, " Conservative use of lot space, potential for expansion."),
+      (8, " Optimal utilization with good balance of built and open space."),
+      (5, " High lot coverage may limit outdoor space.")],
+     lambda p, v: f"Building covers {v:.1%} of lot."),
+    ('lot_orientation',
+     lambda p: None,
+     [],
+     [(6, "Lot orientation analysis requires additional survey data.")],
+     lambda p, v: ""),
+    ('privacy',
+     lambda p: p.lot,
+     [8000, 15000],
+     [(5, "Standard lot size with typical suburban privacy levels."),
+      (7, "Good lot size allows for reasonable privacy."),
+      (8, "Large lot provides excellent privacy and buffer from neighbors.")],
+     lambda p, v: ""),
+    ('views',
+     lambda p: None,
+     [],
+     [(6, "View quality assessment requires on-site evaluation.")],
+     lambda p, v: ""),
+    ('architectural_style',
+     lambda p: p.year,
+     [1970, 1990, 2010],
+     [(6, ""),
+      (5, " Mature property that may benefit from updates."),
+      (6, " Well-maintained property with updated features."),
+      (7, " Modern construction with contemporary design.")],
+     lambda p, v: f"{p.ptype} built in {v}."),
+    ('finishes',
+     lambda p: p.year,
+     [2000, 2015],
+     [(6, "Finish quality assessment based on property age and data."),
+      (6, "Property likely has good quality finishes with some updates needed."),
+      (7, "Recent construction likely features modern finishes.")],
+     lambda p, v: ""),
+    ('layout',
+     _space_per_bedroom,
+     [-math.inf, 400, 600],
+     [(6, ""),
+      (5, " Compact layout may feel cramped."),
+      (6, " Well-proportioned layout."),
+      (7, " Spacious layout with generous room sizes.")],
+     lambda p, v: f"{p.beds} bedrooms, {p.baths} bathrooms, {p.living:,} sq ft."),
+    ('scale_&_volume',
+     lambda p: p.living,
+     [1500, 2000, 3000],
+     [(5, " Compact scale suitable for smaller households."),
+      (6, " Comfortable scale for most households."),
+      (7, " Good scale appropriate for family living."),
+      (8, " Generous scale provides impressive volume and presence.")],
+     lambda p, v: f"{v:,} sq ft across {p.stories} stor{'y' if p.stories == 1 else 'ies'}."),
+]
+
+def _pick(value: Any, cutoffs: list, bands: list) -> tuple:
+    """Return the (score, suffix) band that value falls in"""
+    if value is None:
+        return bands[0]
+    return bands[bisect.bisect_left(cutoffs, value)]
 
 class ReValAgent:
     """Main agent that coordinates property valuation and report generation"""
     
     def __init__(self):
         self.zillow_client = ZillowClient()
-        self.pdf_generator = ReValPDFGenerator()
+        self._pdf_generator = None
         self.logger = logging.getLogger(__name__)
-        
-        # Set up logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
     
-    def generate_property_report(self, address: str, city: str, state: str) -> Optional[str]:
+    @property
+    def pdf_generator(self):
+        """PDF generator, created on first use so the PDF library is only imported when a report is built"""
+        if self._pdf_generator is None:
+            from .pdf_generator import ReValPDFGenerator
+            self._pdf_generator = ReValPDFGenerator()
+        return self._pdf_generator
+    
+    def generate_property_report(self, address: str, city: str, state: str, timeout: float = DEFAULT_REPORT_TIMEOUT) -> Optional[str]:
         """
         Generate a complete property valuation report
         
@@ -30,14 +152,17 @@ class ReValAgent:
             address: Street address
             city: City name
             state: State abbreviation
+            timeout: Seconds the report's API calls may take in total
             
         Returns:
             Path to generated PDF report or None if error
         """
+        deadline = time.monotonic() + timeout
+        
         try:
             # Step 1: Search for property
             self.logger.info(f"Searching for property: {address}, {city}, {state}")
-            search_results = self.zillow_client.search_properties(address, city, state)
+            search_results = self.zillow_client.search_properties(address, city, state, deadline=deadline)
             
             if not search_results or not search_results.get('results'):
                 self.logger.error("No properties found")
@@ -51,16 +176,22 @@ class ReValAgent:
                 self.logger.error("No ZPID found for property")
                 return None
             
-            # Step 2: Get detailed property information
+            # Step 2 & 3: Fetch details and comparable sales (optional) concurrently
             self.logger.info(f"Fetching detailed information for ZPID: {zpid}")
-            property_details = self.zillow_client.get_property_details(zpid)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                details_future = executor.submit(self.zillow_client.get_property_details, zpid, deadline)
+                comparables_future = executor.submit(self.zillow_client.get_comparable_sales, zpid, deadline)
+                property_details = details_future.result()
+                comparable_sales = comparables_future.result()
             
             if not property_details:
                 self.logger.error("Failed to get property details")
                 return None
             
-            # Step 3: Get comparable sales (optional)
-            comparable_sales = self.zillow_client.get_comparable_sales(zpid)
+            # Skip analysis and PDF layout when the listing is too sparse to report on
+            if sum(1 for key in REQUIRED_FIELDS if property_details.get(key)) < 2:
+                self.logger.warning(f"Insufficient property data for ZPID {zpid}, skipping report")
+                return None
             
             # Step 4: Analyze property data for 10 quality factors
             analysis = self._analyze_property_factors(property_details, comparable_sales)
@@ -76,6 +207,24 @@ class ReValAgent:
             self.logger.error(f"Error generating property report: {e}")
             return None
     
+    def generate_reports(self, properties: List[Tuple[str, str, str]], max_workers: int = 8, timeout: float = DEFAULT_REPORT_TIMEOUT) -> List[Optional[str]]:
+        """
+        Generate reports for many properties concurrently
+        
+        Args:
+            properties: (address, city, state) for each property
+            max_workers: Number of reports to generate at once
+            timeout: Seconds each report's API calls may take in total
+            
+        Returns:
+            Path to each generated PDF report, or None where it failed, in input order
+        """
+        # Each report fetches details and comparable sales at the same time
+        self.zillow_client.ensure_pool_size(2 * max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda prop: self.generate_property_report(*prop, timeout=timeout), properties))
+    
     def _analyze_property_factors(self, property_data: Dict[str, Any], comparable_sales: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Analyze property data and map to 10 quality factors
@@ -88,244 +237,19 @@ class ReValAgent:
             Analysis results for each quality factor
         """
         analysis = {}
+        p = _property_fields(property_data)
         
-        # 1. Location
-        analysis['location'] = self._analyze_location(property_data)
-        
-        # 2. Lot Quality
-        analysis['lot_quality'] = self._analyze_lot_quality(property_data)
-        
-        # 3. Lot Utilization
-        analysis['lot_utilization'] = self._analyze_lot_utilization(property_data)
-        
-        # 4. Lot Orientation
-        analysis['lot_orientation'] = self._analyze_lot_orientation(property_data)
-        
-        # 5. Privacy
-        analysis['privacy'] = self._analyze_privacy(property_data)
-        
-        # 6. Views
-        analysis['views'] = self._analyze_views(property_data)
-        
-        # 7. Architectural Style
-        analysis['architectural_style'] = self._analyze_architectural_style(property_data)
-        
-        # 8. Finishes
-        analysis['finishes'] = self._analyze_finishes(property_data)
-        
-        # 9. Layout
-        analysis['layout'] = self._analyze_layout(property_data)
-        
-        # 10. Scale & Volume
-        analysis['scale_&_volume'] = self._analyze_scale_volume(property_data)
+        for name, extract, cutoffs, bands, describe in FACTOR_RULES:
+            value = extract(p)
+            score, suffix = _pick(value, cutoffs, bands)
+            analysis[name] = {
+                'score': score,
+                'analysis': describe(p, value) + suffix
+            }
         
         return analysis
-    
-    def _analyze_location(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze location quality factor"""
-        address = data.get('address', '')
-        city = data.get('city', '')
-        state = data.get('state', '')
-        
-        # Basic analysis based on available data
-        score = 7  # Default score
-        analysis = f"Property located at {address}, {city}, {state}."
-        
-        # Enhance based on neighborhood data if available
-        if data.get('schools'):
-            score += 1
-            analysis += " Good school district in area."
-        
-        return {
-            'score': min(score, 10),
-            'analysis': analysis
-        }
-    
-    def _analyze_lot_quality(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze lot quality factor"""
-        lot_size = data.get('lotAreaValue', 0)
-        
-        score = 6  # Default score
-        analysis = f"Lot size: {lot_size} sq ft."
-        
-        if lot_size > 10000:
-            score = 9
-            analysis += " Large lot provides excellent space and potential."
-        elif lot_size > 7500:
-            score = 7
-            analysis += " Good-sized lot with adequate space."
-        elif lot_size > 5000:
-            score = 6
-            analysis += " Standard lot size for the area."
-        else:
-            score = 4
-            analysis += " Smaller lot may limit outdoor activities."
-        
-        return {
-            'score': score,
-            'analysis': analysis
-        }
-    
-    def _analyze_lot_utilization(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze lot utilization factor"""
-        living_area = data.get('livingArea', 0)
-        lot_size = data.get('lotAreaValue', 1)
-        
-        utilization_ratio = living_area / lot_size if lot_size > 0 else 0
-        
-        score = 6  # Default
-        analysis = f"Building covers {utilization_ratio:.1%} of lot."
-        
-        if 0.15 <= utilization_ratio <= 0.25:
-            score = 8
-            analysis += " Optimal utilization with good balance of built and open space."
-        elif utilization_ratio < 0.15:
-            score = 6
-            analysis += " Conservative use of lot space, potential for expansion."
-        else:
-            score = 5
-            analysis += " High lot coverage may limit outdoor space."
-        
-        return {
-            'score': score,
-            'analysis': analysis
-        }
-    
-    def _analyze_lot_orientation(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze lot orientation factor"""
-        # This would require more detailed data about property positioning
-        score = 6  # Default neutral score
-        analysis = "Lot orientation analysis requires additional survey data."
-        
-        return {
-            'score': score,
-            'analysis': analysis
-        }
-    
-    def _analyze_privacy(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze privacy factor"""
-        lot_size = data.get('lotAreaValue', 0)
-        
-        score = 6  # Default
-        analysis = "Privacy assessment based on lot characteristics."
-        
-        if lot_size > 15000:
-            score = 8
-            analysis = "Large lot provides excellent privacy and buffer from neighbors."
-        elif lot_size > 8000:
-            score = 7
-            analysis = "Good lot size allows for reasonable privacy."
-        else:
-            score = 5
-            analysis = "Standard lot size with typical suburban privacy levels."
-        
-        return {
-            'score': score,
-            'analysis': analysis
-        }
-    
-    def _analyze_views(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze views factor"""
-        # This would require more detailed data about surroundings
-        score = 6  # Default neutral score
-        analysis = "View quality assessment requires on-site evaluation."
-        
-        return {
-            'score': score,
-            'analysis': analysis
-        }
-    
-    def _analyze_architectural_style(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze architectural style factor"""
-        year_built = data.get('yearBuilt', 0)
-        home_type = data.get('propertyType', '')
-        
-        score = 6  # Default
-        analysis = f"{home_type} built in {year_built}."
-        
-        if year_built > 2010:
-            score = 7
-            analysis += " Modern construction with contemporary design."
-        elif year_built > 1990:
-            score = 6
-            analysis += " Well-maintained property with updated features."
-        elif year_built > 1970:
-            score = 5
-            analysis += " Mature property that may benefit from updates."
-        
-        return {
-            'score': score,
-            'analysis': analysis
-        }
-    
-    def _analyze_finishes(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze finishes factor"""
-        year_built = data.get('yearBuilt', 0)
-        
-        score = 6  # Default
-        analysis = "Finish quality assessment based on property age and data."
-        
-        if year_built > 2015:
-            score = 7
-            analysis = "Recent construction likely features modern finishes."
-        elif year_built > 2000:
-            score = 6
-            analysis = "Property likely has good quality finishes with some updates needed."
-        
-        return {
-            'score': score,
-            'analysis': analysis
-        }
-    
-    def _analyze_layout(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze layout factor"""
-        bedrooms = data.get('bedrooms', 0)
-        bathrooms = data.get('bathrooms', 0)
-        living_area = data.get('livingArea', 0)
-        
-        score = 6  # Default
-        analysis = f"{bedrooms} bedrooms, {bathrooms} bathrooms, {living_area:,} sq ft."
-        
-        # Calculate space efficiency
-        if bedrooms > 0:
-            space_per_bedroom = living_area / bedrooms
-            if space_per_bedroom > 600:
-                score = 7
-                analysis += " Spacious layout with generous room sizes."
-            elif space_per_bedroom > 400:
-                score = 6
-                analysis += " Well-proportioned layout."
-            else:
-                score = 5
-                analysis += " Compact layout may feel cramped."
-        
-        return {
-            'score': score,
-            'analysis': analysis
-        }
-    
-    def _analyze_scale_volume(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Analyze scale & volume factor"""
-        living_area = data.get('livingArea', 0)
-        stories = data.get('stories', 1)
-        
-        score = 6  # Default
-        analysis = f"{living_area:,} sq ft across {stories} stor{'y' if stories == 1 else 'ies'}."
-        
-        if living_area > 3000:
-            score = 8
-            analysis += " Generous scale provides impressive volume and presence."
-        elif living_area > 2000:
-            score = 7
-            analysis += " Good scale appropriate for family living."
-        elif living_area > 1500:
-            score = 6
-            analysis += " Comfortable scale for most households."
-        else:
-            score = 5
-            analysis += " Compact scale suitable for smaller households."
-        
-        return {
-            'score': score,
-            'analysis': analysis
-        }
+
+@functools.lru_cache(maxsize=1)
+def get_agent() -> ReValAgent:
+    """Shared agent, so batch callers reuse one HTTP session and PDF generator"""
+    return ReValAgent()
@@ -4,17 +4,95 @@ Fetches property data from RapidAPI Zillow endpoints
 """
 
 import os
+import time
+import hashlib
+import threading
 import requests
 import logging
+import orjson
 from typing import Dict, Optional, Any
+from urllib.parse import urlencode
+from email.utils import parsedate_to_datetime
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 load_dotenv()
 
+# Retry policy for transient failures and rate limiting. Retries run in
+# _cached_get rather than inside urllib3 so every attempt is throttled.
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+
+# Per-attempt timeout in seconds; a caller's deadline can shorten it
+REQUEST_TIMEOUT = 30
+
+# Longest Retry-After worth waiting out; anything longer (e.g. an exhausted
+# quota) fails the call right away instead of parking the thread
+RETRY_AFTER_MAX = 10
+
+def _is_empty(data: Any) -> bool:
+    """True for responses with nothing in them, e.g. a search with no results"""
+    if not data:
+        return True
+    return isinstance(data, dict) and 'results' in data and not data['results']
+
+def _time_left(deadline: Optional[float], endpoint: str) -> float:
+    """Timeout for the next attempt, raising once the caller's deadline has passed"""
+    if deadline is None:
+        return REQUEST_TIMEOUT
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise requests.exceptions.Timeout(f"Time budget exhausted before requesting {endpoint}")
+    return min(REQUEST_TIMEOUT, remaining)
+
+def _out_of_time(deadline: Optional[float], delay: float) -> bool:
+    """True if waiting `delay` seconds would run past the deadline"""
+    return deadline is not None and time.monotonic() + delay >= deadline
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (seconds or HTTP date), if any"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class _RateLimiter:
+    """Token bucket allowing `rate` calls per second on average, with short bursts, across threads"""
+    
+    def __init__(self, rate: float, burst: int = 2):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        """Block until a token is available, then take it"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
 class ZillowClient:
     """Client for interacting with Zillow API via RapidAPI"""
     
-    def __init__(self):
+    def __init__(self, pool_size: int = 4):
         self.api_key = os.getenv('RAPIDAPI_KEY')
         self.host = os.getenv('RAPIDAPI_HOST', 'zillow-com1.p.rapidapi.com')
         self.base_url = f"https://{self.host}"
@@ -27,9 +105,116 @@ class ZillowClient:
             'X-RapidAPI-Host': self.host
         }
         
+        # Pooled session so all calls for a report reuse one keep-alive connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.pool_size = 0
+        self.pool_lock = threading.Lock()
+        self.ensure_pool_size(pool_size)
+        
+        # Client-side throttle so concurrent batch reports stay under the plan's limit
+        self.rate_limiter = _RateLimiter(float(os.getenv('RAPIDAPI_RATE_LIMIT', '5')))
+        
+        # On-disk response cache, disable with REVAL_CACHE=0
+        self.cache = None
+        if os.getenv('REVAL_CACHE', '1') == '1':
+            import diskcache
+            self.cache = diskcache.Cache(os.getenv('REVAL_CACHE_DIR', './.reval_cache'))
+        
         self.logger = logging.getLogger(__name__)
     
-    def search_properties(self, address: str, city: str, state: str) -> Optional[Dict[str, Any]]:
+    def ensure_pool_size(self, pool_size: int):
+        """
+        Grow the connection pool so it can hold `pool_size` concurrent requests
+        
+        Args:
+            pool_size: Number of connections to keep alive
+        """
+        with self.pool_lock:
+            if pool_size <= self.pool_size:
+                return
+            old_adapter = self.session.adapters.get('https://')
+            self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=pool_size))
+            self.pool_size = pool_size
+            
+            # Release the old pool's idle keep-alive sockets; requests already in
+            # flight on it finish normally and their connections are discarded
+            if isinstance(old_adapter, HTTPAdapter):
+                old_adapter.close()
+    
+    def _cached_get(self, endpoint: str, params: Dict[str, Any], ttl: int = 86400, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        GET an endpoint, serving repeat requests from the disk cache
+        
+        Args:
+            endpoint: API endpoint path
+            params: Query parameters
+            ttl: Seconds to keep a cached response
+            deadline: time.monotonic() value by which the call must finish (optional)
+            
+        Returns:
+            Parsed JSON response
+        """
+        key = hashlib.sha1((endpoint + urlencode(sorted(params.items()))).encode()).hexdigest()
+        
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        response = self._get_with_retries(endpoint, params, deadline)
+        data = orjson.loads(response.content)
+        
+        # Don't pin a "not found" answer for the full TTL; the API may fill it in later
+        if self.cache is not None and not _is_empty(data):
+            self.cache.set(key, data, expire=ttl)
+        return data
+    
+    def _get_with_retries(self, endpoint: str, params: Dict[str, Any], deadline: Optional[float] = None) -> requests.Response:
+        """
+        GET an endpoint, retrying transient failures and rate limiting (429) with
+        exponential backoff and waiting out any Retry-After up to RETRY_AFTER_MAX
+        seconds. Every attempt takes a rate limiter token, and no attempt or
+        backoff runs past the deadline.
+        
+        Args:
+            endpoint: API endpoint path
+            params: Query parameters
+            deadline: time.monotonic() value by which the call must finish (optional)
+            
+        Returns:
+            Successful response
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            delay = BACKOFF_FACTOR * (2 ** attempt)
+            
+            self.rate_limiter.wait()
+            try:
+                response = self.session.get(
+                    f"{self.base_url}{endpoint}",
+                    params=params,
+                    timeout=_time_left(deadline, endpoint)
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == MAX_RETRIES or _out_of_time(deadline, delay):
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response
+                retry_after = _retry_after(response)
+                if retry_after is not None:
+                    if retry_after > RETRY_AFTER_MAX:
+                        self.logger.warning(f"{endpoint} asked to retry after {retry_after:.0f}s, giving up")
+                        response.raise_for_status()
+                    delay = retry_after
+                if attempt == MAX_RETRIES or _out_of_time(deadline, delay):
+                    response.raise_for_status()
+            
+            self.logger.warning(f"Retrying {endpoint} in {delay:.1f}s (attempt {attempt + 1} of {MAX_RETRIES})")
+            time.sleep(delay)
+    
+    def search_properties(self, address: str, city: str, state: str, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Search for properties by address
         
@@ -37,6 +222,7 @@ class ZillowClient:
             address: Street address
             city: City name
             state: State abbreviation
+            deadline: time.monotonic() value by which the call must finish (optional)
             
         Returns:
             Property search results or None if error
@@ -49,25 +235,19 @@ class ZillowClient:
         }
         
         try:
-            response = requests.get(
-                f"{self.base_url}{endpoint}",
-                headers=self.headers,
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._cached_get(endpoint, params, deadline=deadline)
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             self.logger.error(f"Error searching properties: {e}")
             return None
     
-    def get_property_details(self, zpid: str) -> Optional[Dict[str, Any]]:
+    def get_property_details(self, zpid: str, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Get detailed property information by Zillow Property ID
         
         Args:
             zpid: Zillow Property ID
+            deadline: time.monotonic() value by which the call must finish (optional)
             
         Returns:
             Detailed property data or None if error
@@ -77,25 +257,19 @@ class ZillowClient:
         params = {'zpid': zpid}
         
         try:
-            response = requests.get(
-                f"{self.base_url}{endpoint}",
-                headers=self.headers,
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._cached_get(endpoint, params, deadline=deadline)
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             self.logger.error(f"Error getting property details: {e}")
             return None
     
-    def get_comparable_sales(self, zpid: str) -> Optional[Dict[str, Any]]:
+    def get_comparable_sales(self, zpid: str, deadline: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Get comparable sales data for a property
         
         Args:
             zpid: Zillow Property ID
+            deadline: time.monotonic() value by which the call must finish (optional)
             
         Returns:
             Comparable sales data or None if error
@@ -105,15 +279,8 @@ class ZillowClient:
         params = {'zpid': zpid}
         
         try:
-            response = requests.get(
-                f"{self.base_url}{endpoint}",
-                headers=self.headers,
-                params=params,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._cached_get(endpoint, params, deadline=deadline)
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             self.logger.error(f"Error getting comparable sales: {e}")
             return None